@@ -7,47 +7,18 @@ import json
 import re
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
 import logging
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from utils.api_key_manager import get_api_key_manager
+from utils.llm_client import call_llm, acall_llm
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
 
-def analyze_candidate_with_agent(parsed_resume: dict, job_requirements: dict, max_retries: int = 3) -> dict:
-    """Analyze candidate using direct API call with automatic key rotation"""
-    
-    api_manager = get_api_key_manager()
-    provider = os.getenv("LLM_PROVIDER", "openrouter").lower()
-    
-    if provider == "groq":
-        model = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
-        base_url = "https://api.groq.com/openai/v1"
-    else:
-        model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3.1-70b-instruct")
-        base_url = "https://openrouter.ai/api/v1"
-    
-    # Try with rotation
-    for attempt in range(max_retries):
-        try:
-            api_key = api_manager.get_current_key()
-            logger.info(f"Using {provider.upper()} API Key #{api_manager.get_key_number()}/{api_manager.get_total_keys()}")
-            
-            if not api_key or api_key == "your_groq_key_here":
-                return {"status": "error", "error": f"{provider.upper()} API key not configured"}
-        
-            logger.info(f"Using model: {model}")
-            
-            # Use OpenAI client
-            client = OpenAI(
-                api_key=api_key,
-                base_url=base_url
-            )
-            
-            prompt = f"""You are an expert recruiter analyzing a candidate against job requirements.
+def _build_messages(parsed_resume, job_requirements):
+    """Build the chat messages for the API call"""
+    prompt = f"""You are an expert recruiter analyzing a candidate against job requirements.
 
 CANDIDATE DATA:
 {json.dumps(parsed_resume, indent=2)}
@@ -105,49 +76,36 @@ Return ONLY valid JSON with this structure:
 }}
 
 Return ONLY the JSON, no additional text."""
-        
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": "You are an expert recruiter. Analyze candidates and return ONLY valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3
-            )
-            
-            result_text = response.choices[0].message.content
-            
-            # Parse JSON response
-            try:
-                json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
-                if json_match:
-                    analysis_data = json.loads(json_match.group())
-                    analysis_data["status"] = "success"
-                    logger.info("✅ Successfully analyzed candidate")
-                    return analysis_data
-                else:
-                    return {"status": "error", "error": "Could not extract JSON from response"}
-            except json.JSONDecodeError as e:
-                return {"status": "error", "error": f"JSON parsing failed: {str(e)}", "raw_response": result_text[:500]}
-        
-        except Exception as e:
-            error_str = str(e)
-            
-            # Check if it's a rate limit error
-            if "rate_limit" in error_str.lower() or "429" in error_str:
-                logger.warning(f"⚠️ Rate limit hit on Key #{api_manager.get_key_number()}")
-                
-                # Rotate to next key
-                if attempt < max_retries - 1:
-                    api_manager.rotate_to_next()
-                    logger.info(f"🔄 Retrying with Key #{api_manager.get_key_number()}...")
-                    continue
-                else:
-                    logger.error("❌ All API keys exhausted, all hit rate limits")
-                    return {"status": "error", "error": "All API keys have hit rate limits. Please wait or add more keys."}
-            else:
-                # Non-rate-limit error, don't retry
-                logger.error(f"API call failed: {error_str}")
-                return {"status": "error", "error": f"API call failed: {error_str}"}
     
-    return {"status": "error", "error": "Failed after all retries"}
+    return [
+        {"role": "system", "content": "You are an expert recruiter. Analyze candidates and return ONLY valid JSON."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _parse_response(result_text):
+    """Extract the JSON object from the model response"""
+    try:
+        json_match = re.search(r'\{.*\}', result_text, re.DOTALL)
+        if json_match:
+            analysis_data = json.loads(json_match.group())
+            analysis_data["status"] = "success"
+            logger.info("✅ Successfully analyzed candidate")
+            return analysis_data
+        else:
+            return {"status": "error", "error": "Could not extract JSON from response"}
+    except json.JSONDecodeError as e:
+        return {"status": "error", "error": f"JSON parsing failed: {str(e)}", "raw_response": result_text[:500]}
+
+
+def analyze_candidate_with_agent(parsed_resume: dict, job_requirements: dict, max_retries: int = 3, api_key: str = None) -> dict:
+    """Analyze candidate using direct API call with automatic key rotation"""
+    return call_llm(_build_messages(parsed_resume, job_requirements), 0.3, _parse_response, max_retries=max_retries, api_key=api_key)
+
+
+async def aanalyze_candidate_with_agent(parsed_resume: dict, job_requirements: dict, max_retries: int = 3, api_key: str = None, clients=None) -> dict:
+    """Async variant of analyze_candidate_with_agent for concurrent bulk analysis"""
+    return await acall_llm(
+        _build_messages(parsed_resume, job_requirements), 0.3, _parse_response,
+        max_retries=max_retries, api_key=api_key, clients=clients
+    )
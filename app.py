@@ -3,19 +3,26 @@ AI-Powered Resume Analysis System
 Complete 2-Agent Workflow Implementation
 """
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import os
 import pandas as pd
+import numpy as np
 from datetime import datetime
-import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
 from dotenv import load_dotenv
 import logging
+import threading
+import time
 
 # Try to import PDF/DOCX libraries (all optional)
 try:
-    import PyPDF2
-    HAS_PYPDF2 = True
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
 except ImportError:
-    HAS_PYPDF2 = False
+    HAS_PYMUPDF = False
 
 try:
     import pdfplumber
@@ -29,11 +36,18 @@ try:
 except ImportError:
     HAS_DOCX = False
 
-load_dotenv()
+@st.cache_resource(show_spinner=False)
+def _load_env():
+    """Load .env once per server process instead of on every rerun"""
+    load_dotenv()
+    return True
+
+
+_load_env()
 
 # Show warnings for missing libraries
-if not HAS_PYPDF2 and not HAS_PDFPLUMBER:
-    st.error("❌ No PDF library installed! Install with: pip install PyPDF2")
+if not HAS_PYMUPDF and not HAS_PDFPLUMBER:
+    st.error("❌ No PDF library installed! Install with: pip install PyMuPDF")
 
 # Configure logging
 logging.basicConfig(
@@ -45,53 +59,119 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# pdfminer (used by pdfplumber) logs per-token; keep it quiet
+logging.getLogger("pdfminer").setLevel(logging.ERROR)
+logging.getLogger("pdfplumber").setLevel(logging.ERROR)
+
 # Configure page
 st.set_page_config(page_title="AI Resume Analysis System", layout="wide", page_icon="🤖")
 
-# Create directories
-os.makedirs("data/uploads", exist_ok=True)
-os.makedirs("data/results", exist_ok=True)
+# Create directories (once per server process)
+@st.cache_resource(show_spinner=False)
+def _create_data_dirs():
+    os.makedirs("data/uploads", exist_ok=True)
+    os.makedirs("data/results", exist_ok=True)
+    return True
+
+
+_create_data_dirs()
 
 # Import modules
-from crew_setup import run_complete_analysis
+from crew_setup import arun_complete_analysis
+from utils.api_key_manager import get_api_key_manager
+from utils.llm_client import AsyncClientPool
 
 # No database - results stored in session only
 USE_CHROMADB = False
 
+# Concurrent LLM requests allowed per configured API key in bulk mode
+REQUESTS_PER_KEY = 4
 
-def extract_text_from_file(uploaded_file):
-    """Extract text from PDF/DOCX/TXT files"""
+# Columns of the session results store (one list per column)
+RESULT_COLUMNS = [
+    "name", "email", "phone", "experience_years", "skills", "confidence_score",
+    "shortlisted", "key_strengths", "gaps", "recommendation", "date", "resume_file"
+]
+
+# Minimum seconds between progress bar updates in bulk mode
+PROGRESS_INTERVAL = 0.5
+
+# Give up on a file whose text extraction takes longer than this (seconds)
+EXTRACTION_TIMEOUT = 10
+
+# Files parsed at once across the server process; the pool is larger so
+# threads waiting for a parse slot don't make new files queue for a thread
+EXTRACTION_WORKERS = 4
+EXTRACTION_POOL_SIZE = 16
+
+# Stop reading a PDF after this many pages or characters
+MAX_PDF_PAGES = 10
+MAX_PDF_CHARS = 60_000
+
+# Initial capacity of the score/shortlist arrays used for sidebar statistics
+STATS_CAPACITY = 100
+
+
+class EncryptedPDFError(Exception):
+    """Raised by a PDF parser when the document is password-protected"""
+
+
+def _extract_with_pymupdf(file_bytes):
+    """Extract PDF text with PyMuPDF"""
+    text = ""
+    with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+        if doc.needs_pass:
+            raise EncryptedPDFError()
+        for i, page in enumerate(doc):
+            text += page.get_text() + "\n"
+            if i + 1 >= MAX_PDF_PAGES or len(text) > MAX_PDF_CHARS:
+                break
+    return text
+
+
+def _extract_with_pdfplumber(file_bytes):
+    """Extract PDF text with pdfplumber"""
+    text = ""
+    # laparams=None is pdfplumber's default; pinned so layout analysis stays off
+    with pdfplumber.open(BytesIO(file_bytes), laparams=None) as pdf:
+        for i, page in enumerate(pdf.pages):
+            text += page.extract_text() or ""
+            if i + 1 >= MAX_PDF_PAGES or len(text) > MAX_PDF_CHARS:
+                break
+    return text
+
+
+# PDF parsers in order of preference (PyMuPDF is much faster than pdfplumber)
+PDF_PARSERS = []
+if HAS_PYMUPDF:
+    PDF_PARSERS.append(("pymupdf", _extract_with_pymupdf))
+if HAS_PDFPLUMBER:
+    PDF_PARSERS.append(("pdfplumber", _extract_with_pdfplumber))
+
+
+@st.cache_data(show_spinner=False)
+def _extract_text_cached(file_bytes: bytes, filename: str, mime: str) -> tuple:
+    """Extract text from raw PDF/DOCX/TXT bytes (cached on file content)"""
     try:
-        if uploaded_file.type == "application/pdf":
-            # Try PyPDF2 first
-            try:
-                pdf_reader = PyPDF2.PdfReader(uploaded_file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() or ""
-                if text.strip():
-                    return text, True, None
-            except:
-                pass
-            
-            # Fallback to pdfplumber
-            try:
-                uploaded_file.seek(0)
-                with pdfplumber.open(uploaded_file) as pdf:
-                    text = ""
-                    for page in pdf.pages:
-                        text += page.extract_text() or ""
-                if text.strip():
-                    return text, True, None
-            except:
-                pass
+        if mime == "application/pdf":
+            # Single attempt per parser, fastest first
+            for parser_name, parser in PDF_PARSERS:
+                try:
+                    text = parser(file_bytes)
+                    if text.strip():
+                        return text, True, None
+                except EncryptedPDFError:
+                    # No other parser can read it either
+                    return "", False, "Encrypted PDF"
+                except Exception as e:
+                    logger.warning(f"{parser_name} could not read {filename}: {str(e)}")
             
             return "", False, "Could not extract text from PDF"
         
-        elif "wordprocessingml" in uploaded_file.type or uploaded_file.name.endswith(".docx"):
+        elif "wordprocessingml" in mime or filename.endswith(".docx"):
             try:
-                doc = Document(uploaded_file)
-                text = "\n".join([para.text for para in doc.paragraphs])
+                doc = Document(BytesIO(file_bytes))
+                text = "\n".join(para.text for para in doc.paragraphs if para.text)
                 if text.strip():
                     return text, True, None
                 return "", False, "DOCX file is empty"
@@ -100,7 +180,7 @@ def extract_text_from_file(uploaded_file):
         
         else:  # Text file
             try:
-                text = uploaded_file.getvalue().decode("utf-8")
+                text = file_bytes.decode("utf-8")
                 if text.strip():
                     return text, True, None
                 return "", False, "Text file is empty"
@@ -111,6 +191,301 @@ def extract_text_from_file(uploaded_file):
         return "", False, f"Unexpected error: {str(e)}"
 
 
+def extract_text_from_file(uploaded_file):
+    """Extract text from PDF/DOCX/TXT files"""
+    return _extract_text_cached(uploaded_file.getvalue(), uploaded_file.name, uploaded_file.type)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_extraction_executor():
+    """Thread pool for bulk text extraction, shared for the server process.
+    
+    Kept separate from the event loop's default executor: asyncio.run joins
+    that one on exit, so one hung parse would block the whole bulk run.
+    """
+    return ThreadPoolExecutor(max_workers=EXTRACTION_POOL_SIZE, thread_name_prefix="extract")
+
+
+@st.cache_resource
+def _get_extraction_slots():
+    """Caps parses running at once for the server process, across sessions and runs"""
+    return threading.BoundedSemaphore(EXTRACTION_WORKERS)
+
+
+def _extract_in_slot(uploaded_file, on_start, ctx):
+    """Extraction pool worker: wait for a parse slot, report the start, then parse"""
+    # Pool threads have no script context of their own; st.cache_data needs the
+    # submitting session's to look up and store results without warnings
+    add_script_run_ctx(threading.current_thread(), ctx)
+    with _get_extraction_slots():
+        on_start()
+        return extract_text_from_file(uploaded_file)
+
+
+async def _process_one(uploaded_file, job_requirements, semaphore, clients):
+    """Extract text and run the 2-agent workflow for one resume"""
+    outcome = {"file_name": uploaded_file.name, "text_length": 0, "result": None, "error": None}
+    
+    # Parsing is CPU-bound, keep it off the event loop
+    loop = asyncio.get_running_loop()
+    started = asyncio.Event()
+    future = loop.run_in_executor(
+        _get_extraction_executor(), _extract_in_slot, uploaded_file,
+        partial(loop.call_soon_threadsafe, started.set), get_script_run_ctx()
+    )
+    try:
+        # Time only the parse itself, not the wait for a slot
+        await started.wait()
+        resume_text, success, error = await asyncio.wait_for(future, EXTRACTION_TIMEOUT)
+    except asyncio.TimeoutError:
+        # The parse can't be killed: it keeps running in its thread, holding its
+        # slot and the GIL, which slows down the files that are still being extracted
+        logger.warning(f"Text extraction timed out for {uploaded_file.name}")
+        resume_text, success, error = "", False, f"Timed out extracting text after {EXTRACTION_TIMEOUT}s"
+    if not success:
+        outcome["error"] = error
+        return outcome
+    
+    outcome["text_length"] = len(resume_text)
+    async with semaphore:
+        try:
+            # Round-robin key per resume so concurrent requests spread across keys
+            api_key = get_api_key_manager().next_key()
+            outcome["result"] = await arun_complete_analysis(
+                resume_text, job_requirements, api_key=api_key, clients=clients
+            )
+        except Exception as e:
+            outcome["error"] = f"Analysis error: {str(e)}"
+    return outcome
+
+
+async def _analyze_all(uploaded_files, job_requirements, on_outcome, on_progress):
+    """Analyze all resumes concurrently, bounded by the number of API keys"""
+    total_keys = max(get_api_key_manager().get_total_keys(), 1)
+    semaphore = asyncio.Semaphore(total_keys * REQUESTS_PER_KEY)
+    completed = 0
+    
+    async def run(uploaded_file):
+        nonlocal completed
+        outcome = await _process_one(uploaded_file, job_requirements, semaphore, clients)
+        completed += 1
+        # Record before touching the UI: a widget change makes the next UI call
+        # raise Streamlit's rerun exception and cancel the remaining tasks
+        on_outcome(outcome)
+        on_progress(completed, outcome["file_name"])
+        return outcome
+    
+    # One client per key for the whole run, so files share connections
+    async with AsyncClientPool() as clients:
+        return await asyncio.gather(*(run(uploaded_file) for uploaded_file in uploaded_files))
+
+
+def _make_progress_callback(progress_bar, status_text, total_files):
+    """Build a progress updater that re-renders at most every PROGRESS_INTERVAL seconds"""
+    last_tick = time.monotonic()
+    
+    def update(completed, file_name):
+        nonlocal last_tick
+        now = time.monotonic()
+        if completed == total_files or now - last_tick > PROGRESS_INTERVAL:
+            progress_bar.progress(completed / total_files)
+            status_text.text(f"Processed {completed}/{total_files}: {file_name}")
+            last_tick = now
+    
+    return update
+
+
+def _record_outcome(outcome, shortlist_threshold, summary):
+    """Store one finished resume in session state and update the run summary"""
+    file_name = outcome["file_name"]
+    result = outcome["result"]
+    
+    if outcome["error"]:
+        summary["file_log"].append(("error", f"❌ {file_name}: {outcome['error']}"))
+        summary["failed"] += 1
+        summary["failed_files"].append(f"{file_name} - {outcome['error']}")
+        return
+    
+    summary["file_log"].append(("info", f"✅ Extracted {outcome['text_length']} characters from {file_name}"))
+    
+    if result and result.get("status") == "success":
+        logger.info("✅ Analysis completed successfully")
+        
+        parsed = result["parsed_resume"]
+        analysis = result["analysis"]
+        
+        logger.info(f"Parsed candidate: {parsed.get('name', 'Unknown')}")
+        logger.info(f"Skills extracted: {len(parsed.get('skills', []))} skills")
+        logger.info(f"Skills: {parsed.get('skills', [])}")
+        logger.info(f"Confidence score: {analysis.get('confidence_score', 0)}%")
+        logger.info(f"Strengths: {analysis.get('key_strengths', [])}")
+        logger.info(f"Gaps: {analysis.get('gaps', [])}")
+        
+        # Save to session state with FULL data
+        add_result({
+            "name": parsed.get("name", "Unknown"),
+            "email": parsed.get("email", ""),
+            "phone": parsed.get("phone", "N/A"),
+            "experience_years": parsed.get("experience_years", 0),
+            "skills": parsed.get("skills", []),
+            "confidence_score": analysis.get("confidence_score", 0),
+            "shortlisted": analysis.get("confidence_score", 0) >= shortlist_threshold,
+            "key_strengths": analysis.get("key_strengths", []),
+            "gaps": analysis.get("gaps", []),
+            "recommendation": analysis.get("recommendation", "N/A"),
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "resume_file": file_name
+        })
+        
+        # Store last analysis
+        st.session_state.current_analysis = {
+            "parsed": parsed,
+            "analysis": analysis,
+            "resume_name": file_name
+        }
+        
+        summary["successful"] += 1
+        summary["file_log"].append(("success", f"✅ {file_name} - Analysis complete!"))
+        logger.info("✅ ANALYSIS COMPLETE!")
+    else:
+        error_msg = result.get('error', 'Unknown error') if result else 'No result returned'
+        summary["file_log"].append(("error", f"❌ {file_name}: {error_msg}"))
+        logger.error(f"❌ Analysis failed: {error_msg}")
+        summary["failed"] += 1
+        summary["failed_files"].append(f"{file_name} - {error_msg}")
+
+
+def add_result(row):
+    """Append one candidate row to the columnar results store"""
+    count = get_results_count()
+    if count == len(st.session_state.scores_np):
+        # Grow the stats arrays by doubling
+        st.session_state.scores_np = np.concatenate(
+            [st.session_state.scores_np, np.empty(count, dtype=np.float32)]
+        )
+        st.session_state.shortlisted_np = np.concatenate(
+            [st.session_state.shortlisted_np, np.empty(count, dtype=bool)]
+        )
+    st.session_state.scores_np[count] = row["confidence_score"]
+    st.session_state.shortlisted_np[count] = row["shortlisted"]
+    
+    for column in RESULT_COLUMNS:
+        st.session_state.all_results[column].append(row[column])
+    st.session_state.results_dirty = True
+    st.session_state.csv_cache = None
+
+
+def get_results_count():
+    """Number of candidates stored in this session"""
+    return len(st.session_state.all_results["name"])
+
+
+def get_results_df():
+    """Get the results DataFrame, rebuilt only when new results have been added"""
+    count = get_results_count()
+    if st.session_state.get("results_df_count") != count:
+        df = pd.DataFrame.from_dict(st.session_state.all_results)
+        df["shortlisted"] = df["shortlisted"].astype(bool)
+        st.session_state.results_df = df
+        st.session_state.results_df_count = count
+    return st.session_state.results_df
+
+
+def get_csv_bytes(cache_key, df):
+    """CSV export of df, reused while cache_key matches the last export and no new results are added"""
+    cached = st.session_state.csv_cache
+    if cached is None or cached[0] != cache_key:
+        cached = (cache_key, df.to_csv(index=False).encode("utf-8"))
+        st.session_state.csv_cache = cached
+    return cached[1]
+
+
+def get_sorted_results():
+    """Get candidate rows sorted by score, re-sorted only when new results have been added"""
+    if st.session_state.results_dirty:
+        count = get_results_count()
+        order = np.argsort(-st.session_state.scores_np[:count], kind="stable")
+        results = st.session_state.all_results
+        st.session_state.sorted_results = [
+            {column: results[column][i] for column in RESULT_COLUMNS} for i in order
+        ]
+        st.session_state.results_dirty = False
+    return st.session_state.sorted_results
+
+
+def render_results(sorted_results):
+    """Render a full details card for each candidate"""
+    for idx, result in enumerate(sorted_results):
+        score = result.get("confidence_score", 0)
+        
+        # Color coding
+        if score >= 80:
+            emoji = "🟢"
+            level = "Excellent"
+        elif score >= 60:
+            emoji = "🟡"
+            level = "Good"
+        elif score >= 40:
+            emoji = "🟠"
+            level = "Moderate"
+        else:
+            emoji = "🔴"
+            level = "Poor"
+        
+        # Header for each candidate
+        if idx == 0:
+            st.markdown(f"## 🏆 Candidate #{idx + 1} - BEST MATCH")
+        else:
+            st.markdown(f"## Candidate #{idx + 1}")
+        
+        with st.container(border=True):
+            # Top metrics row
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Confidence Score", f"{score}%")
+                st.caption(f"{emoji} {level}")
+            with col2:
+                shortlisted = result.get("shortlisted", False)
+                st.metric("Shortlisted", "✅ Yes" if shortlisted else "❌ No")
+            with col3:
+                recommendation = result.get("recommendation", "N/A")
+                st.metric("Recommendation", recommendation[:30] + "..." if len(recommendation) > 30 else recommendation)
+            
+            st.divider()
+            
+            # Detailed information
+            col_left, col_right = st.columns(2)
+            
+            with col_left:
+                st.subheader("👤 Candidate Information")
+                st.write(f"**Name:** {result.get('name', 'Unknown')}")
+                st.write(f"**Email:** {result.get('email', 'N/A')}")
+                st.write(f"**Phone:** {result.get('phone', 'N/A')}")
+                st.write(f"**Experience:** {result.get('experience_years', 0)} years")
+                
+                st.write("")
+                st.write("**Skills:**")
+                skills = result.get('skills', [])
+                if skills:
+                    st.write(", ".join(skills))
+                else:
+                    st.write("No skills extracted")
+            
+            with col_right:
+                st.subheader("💡 Key Insights")
+                
+                st.write("**Strengths:**")
+                for strength in result.get("key_strengths", []):
+                    st.write(f"✅ {strength}")
+                
+                st.write("")
+                st.write("**Gaps:**")
+                for gap in result.get("gaps", []):
+                    st.write(f"⚠️ {gap}")
+        
+        st.divider()
+
+
 # Initialize session state
 if 'analysis_results' not in st.session_state:
     st.session_state.analysis_results = []
@@ -119,7 +494,12 @@ if 'current_analysis' not in st.session_state:
 
 # No database - use session state only
 if 'all_results' not in st.session_state:
-    st.session_state.all_results = []
+    st.session_state.all_results = {column: [] for column in RESULT_COLUMNS}
+    st.session_state.scores_np = np.empty(STATS_CAPACITY, dtype=np.float32)
+    st.session_state.shortlisted_np = np.empty(STATS_CAPACITY, dtype=bool)
+    st.session_state.sorted_results = []
+    st.session_state.results_dirty = False
+    st.session_state.csv_cache = None
 
 # App title
 st.title("🤖 AI-Powered Resume Analysis System")
@@ -172,9 +552,9 @@ with st.sidebar:
     
     # Statistics
     st.subheader("📊 Statistics")
-    total = len(st.session_state.all_results)
-    shortlisted = sum(1 for r in st.session_state.all_results if r.get("shortlisted", False))
-    avg_score = sum(r.get("confidence_score", 0) for r in st.session_state.all_results) / max(total, 1) if total > 0 else 0
+    total = get_results_count()
+    shortlisted = int(st.session_state.shortlisted_np[:total].sum())
+    avg_score = float(st.session_state.scores_np[:total].mean()) if total > 0 else 0
     
     st.metric("Total Analyzed", total)
     st.metric("Shortlisted", shortlisted)
@@ -208,99 +588,40 @@ with tab1:
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            successful = 0
-            failed = 0
-            failed_files = []
+            # file_log holds (level, message) pairs shown after the run
+            summary = {"successful": 0, "failed": 0, "failed_files": [], "file_log": []}
             
-            for idx, uploaded_file in enumerate(uploaded_files):
-                result = None
-                status_text.text(f"Processing {idx + 1}/{total_files}: {uploaded_file.name}")
-                
-                # Extract text
-                resume_text, success, error = extract_text_from_file(uploaded_file)
-                
-                if not success:
-                    st.error(f"❌ {uploaded_file.name}: {error}")
-                    failed += 1
-                    failed_files.append(f"{uploaded_file.name} - {error}")
-                    progress_bar.progress((idx + 1) / total_files)
-                    continue
-                
-                st.info(f"✅ Extracted {len(resume_text)} characters from {uploaded_file.name}")
-                
-                # Run 2-agent workflow
-                with st.spinner(f"🤖 Analyzing {uploaded_file.name}..."):
-                    job_requirements = {
-                        "job_title": job_title,
-                        "required_skills": required_skills,
-                        "required_experience_years": required_experience,
-                        "min_experience": min_experience,
-                        "max_experience": max_experience,
-                        "nice_to_have": nice_to_have
-                    }
-                    
-                    try:
-                        result = run_complete_analysis(resume_text, job_requirements)
-                    except Exception as e:
-                        st.error(f"❌ {uploaded_file.name}: Analysis error - {str(e)}")
-                        failed += 1
-                        failed_files.append(f"{uploaded_file.name} - Analysis error: {str(e)}")
-                        progress_bar.progress((idx + 1) / total_files)
-                        continue
-                
-                if result and result.get("status") == "success":
-                    logger.info("✅ Analysis completed successfully")
-                    
-                    parsed = result["parsed_resume"]
-                    analysis = result["analysis"]
-                    
-                    logger.info(f"Parsed candidate: {parsed.get('name', 'Unknown')}")
-                    logger.info(f"Skills extracted: {len(parsed.get('skills', []))} skills")
-                    logger.info(f"Skills: {parsed.get('skills', [])}")
-                    logger.info(f"Confidence score: {analysis.get('confidence_score', 0)}%")
-                    logger.info(f"Strengths: {analysis.get('key_strengths', [])}")
-                    logger.info(f"Gaps: {analysis.get('gaps', [])}")
-                    
-                    # Save to session state with FULL data
-                    st.session_state.all_results.append({
-                        "name": parsed.get("name", "Unknown"),
-                        "email": parsed.get("email", ""),
-                        "phone": parsed.get("phone", "N/A"),
-                        "experience_years": parsed.get("experience_years", 0),
-                        "skills": parsed.get("skills", []),
-                        "confidence_score": analysis.get("confidence_score", 0),
-                        "shortlisted": analysis.get("confidence_score", 0) >= shortlist_threshold,
-                        "key_strengths": analysis.get("key_strengths", []),
-                        "gaps": analysis.get("gaps", []),
-                        "recommendation": analysis.get("recommendation", "N/A"),
-                        "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
-                        "resume_file": uploaded_file.name
-                    })
-                    
-                    # Store last analysis
-                    st.session_state.current_analysis = {
-                        "parsed": parsed,
-                        "analysis": analysis,
-                        "resume_name": uploaded_file.name
-                    }
-                    
-                    successful += 1
-                    st.success(f"✅ {uploaded_file.name} - Analysis complete!")
-                    logger.info("✅ ANALYSIS COMPLETE!")
-                else:
-                    error_msg = result.get('error', 'Unknown error') if result else 'No result returned'
-                    st.error(f"❌ {uploaded_file.name}: {error_msg}")
-                    logger.error(f"❌ Analysis failed: {error_msg}")
-                    failed += 1
-                    failed_files.append(f"{uploaded_file.name} - {error_msg}")
-                
-                # Update progress
-                progress_bar.progress((idx + 1) / total_files)
+            job_requirements = {
+                "job_title": job_title,
+                "required_skills": required_skills,
+                "required_experience_years": required_experience,
+                "min_experience": min_experience,
+                "max_experience": max_experience,
+                "nice_to_have": nice_to_have
+            }
+            
+            # Run all files on one event loop - the LLM calls are network-bound
+            with st.spinner(f"🤖 Analyzing {total_files} resume(s)..."):
+                asyncio.run(_analyze_all(
+                    uploaded_files,
+                    job_requirements,
+                    partial(_record_outcome, shortlist_threshold=shortlist_threshold, summary=summary),
+                    _make_progress_callback(progress_bar, status_text, total_files)
+                ))
+            
+            successful = summary["successful"]
+            failed = summary["failed"]
+            failed_files = summary["failed_files"]
+            file_log = summary["file_log"]
             
             # Final summary
             progress_bar.progress(1.0)
             status_text.success(f"✅ Bulk processing complete!")
             
+            with st.expander("Log"):
+                for level, message in file_log:
+                    getattr(st, level)(message)
+            
             if successful > 0:
                 st.success(f"""
                 **Processing Summary:**
@@ -319,7 +640,7 @@ with tab1:
             logger.info("=" * 80)
     
     # Display ALL results after bulk processing - FULL DETAILED VIEW FOR EACH
-    if st.session_state.all_results:
+    if get_results_count() > 0:
         st.divider()
         st.header("📊 All Candidates Analysis Results")
         
@@ -338,78 +659,10 @@ with tab1:
         st.divider()
         
         # Sort by score
-        sorted_results = sorted(st.session_state.all_results, key=lambda x: x.get("confidence_score", 0), reverse=True)
+        sorted_results = get_sorted_results()
         
         # Display each candidate with full details
-        for idx, result in enumerate(sorted_results):
-            score = result.get("confidence_score", 0)
-            
-            # Color coding
-            if score >= 80:
-                emoji = "🟢"
-                level = "Excellent"
-            elif score >= 60:
-                emoji = "🟡"
-                level = "Good"
-            elif score >= 40:
-                emoji = "🟠"
-                level = "Moderate"
-            else:
-                emoji = "🔴"
-                level = "Poor"
-            
-            # Header for each candidate
-            if idx == 0:
-                st.markdown(f"## 🏆 Candidate #{idx + 1} - BEST MATCH")
-            else:
-                st.markdown(f"## Candidate #{idx + 1}")
-            
-            with st.container(border=True):
-                # Top metrics row
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Confidence Score", f"{score}%")
-                    st.caption(f"{emoji} {level}")
-                with col2:
-                    shortlisted = result.get("shortlisted", False)
-                    st.metric("Shortlisted", "✅ Yes" if shortlisted else "❌ No")
-                with col3:
-                    recommendation = result.get("recommendation", "N/A")
-                    st.metric("Recommendation", recommendation[:30] + "..." if len(recommendation) > 30 else recommendation)
-                
-                st.divider()
-                
-                # Detailed information
-                col_left, col_right = st.columns(2)
-                
-                with col_left:
-                    st.subheader("👤 Candidate Information")
-                    st.write(f"**Name:** {result.get('name', 'Unknown')}")
-                    st.write(f"**Email:** {result.get('email', 'N/A')}")
-                    st.write(f"**Phone:** {result.get('phone', 'N/A')}")
-                    st.write(f"**Experience:** {result.get('experience_years', 0)} years")
-                    
-                    st.write("")
-                    st.write("**Skills:**")
-                    skills = result.get('skills', [])
-                    if skills:
-                        st.write(", ".join(skills))
-                    else:
-                        st.write("No skills extracted")
-                
-                with col_right:
-                    st.subheader("💡 Key Insights")
-                    
-                    st.write("**Strengths:**")
-                    for strength in result.get("key_strengths", []):
-                        st.write(f"✅ {strength}")
-                    
-                    st.write("")
-                    st.write("**Gaps:**")
-                    for gap in result.get("gaps", []):
-                        st.write(f"⚠️ {gap}")
-            
-            st.divider()
+        render_results(sorted_results)
     
     # Display single result (for backward compatibility)
     elif st.session_state.current_analysis:
@@ -477,8 +730,8 @@ with tab1:
 with tab2:
     st.header("👥 All Analyzed Candidates")
     
-    if st.session_state.all_results:
-        df = pd.DataFrame(st.session_state.all_results)
+    if get_results_count() > 0:
+        df = get_results_df()
         
         # Filters
         col1, col2 = st.columns(2)
@@ -488,14 +741,15 @@ with tab2:
             show_shortlisted = st.checkbox("Show only shortlisted")
         
         # Apply filters
-        filtered_df = df[df["confidence_score"] >= min_score]
+        mask = df["confidence_score"] >= min_score
         if show_shortlisted:
-            filtered_df = filtered_df[filtered_df["shortlisted"] == True]
+            mask &= df["shortlisted"]
+        filtered_df = df.loc[mask]
         
         st.dataframe(filtered_df, use_container_width=True)
         
         # Download
-        csv = filtered_df.to_csv(index=False)
+        csv = get_csv_bytes(("all", min_score, show_shortlisted), filtered_df)
         st.download_button(
             "📥 Download CSV",
             csv,
@@ -509,13 +763,14 @@ with tab2:
 with tab3:
     st.header("✅ Shortlisted Candidates")
     
-    shortlisted = [r for r in st.session_state.all_results if r.get("shortlisted", False)]
+    results_df = get_results_df()
+    shortlisted = results_df.loc[results_df["shortlisted"]]
     
-    if shortlisted:
-        df = pd.DataFrame(shortlisted)
+    if not shortlisted.empty:
+        df = shortlisted
         st.dataframe(df, use_container_width=True)
         
-        csv = df.to_csv(index=False)
+        csv = get_csv_bytes(("shortlisted",), df)
         st.download_button(
             "📥 Download Shortlisted",
             csv,
@@ -1,8 +1,8 @@
 """
 CrewAI Multi-Agent Setup - Orchestrates Resume Analysis Workflow
 """
-from agents.resume_analyzer_agent import parse_resume_with_agent
-from agents.insight_extractor_agent import analyze_candidate_with_agent
+from agents.resume_analyzer_agent import parse_resume_with_agent, aparse_resume_with_agent
+from agents.insight_extractor_agent import analyze_candidate_with_agent, aanalyze_candidate_with_agent
 
 
 import logging
@@ -10,21 +10,16 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def run_complete_analysis(resume_text: str, job_requirements: dict) -> dict:
-    """
-    Execute complete 2-agent workflow:
-    1. Agent 1: Parse resume and extract data
-    2. Agent 2: Analyze and score candidate
-    """
-    
-    # Step 1: Parse Resume (Agent 1)
+def _start_parsing(resume_text: str):
+    """Log the start of Agent 1"""
     logger.info("=" * 60)
     logger.info("🤖 AGENT 1: Starting Resume Parsing")
     logger.info("=" * 60)
     logger.info(f"Resume length: {len(resume_text)} characters")
-    
-    parsed_resume = parse_resume_with_agent(resume_text)
-    
+
+
+def _check_parsing(parsed_resume: dict):
+    """Log Agent 1 outcome; returns an error result if parsing failed"""
     if parsed_resume.get("status") != "success":
         logger.error(f"❌ AGENT 1 FAILED: {parsed_resume.get('error')}")
         return {
@@ -37,16 +32,20 @@ def run_complete_analysis(resume_text: str, job_requirements: dict) -> dict:
     logger.info(f"Extracted name: {parsed_resume.get('name', 'N/A')}")
     logger.info(f"Extracted email: {parsed_resume.get('email', 'N/A')}")
     logger.info(f"Extracted skills: {len(parsed_resume.get('skills', []))} skills")
-    
-    # Step 2: Analyze & Score (Agent 2)
+    return None
+
+
+def _start_analysis(job_requirements: dict):
+    """Log the start of Agent 2"""
     logger.info("=" * 60)
     logger.info("🤖 AGENT 2: Starting Candidate Analysis")
     logger.info("=" * 60)
     logger.info(f"Job Title: {job_requirements.get('job_title')}")
     logger.info(f"Required Skills: {job_requirements.get('required_skills')}")
-    
-    analysis_result = analyze_candidate_with_agent(parsed_resume, job_requirements)
-    
+
+
+def _finish(parsed_resume: dict, analysis_result: dict) -> dict:
+    """Log Agent 2 outcome and build the final workflow result"""
     if analysis_result.get("status") != "success":
         logger.error(f"❌ AGENT 2 FAILED: {analysis_result.get('error')}")
         return {
@@ -73,3 +72,48 @@ def run_complete_analysis(resume_text: str, job_requirements: dict) -> dict:
     logger.info("=" * 60)
     
     return final_result
+
+
+def run_complete_analysis(resume_text: str, job_requirements: dict, api_key: str = None) -> dict:
+    """
+    Execute complete 2-agent workflow:
+    1. Agent 1: Parse resume and extract data
+    2. Agent 2: Analyze and score candidate
+    
+    api_key pins both agents to one key (they rotate away from it on rate limits)
+    """
+    
+    # Step 1: Parse Resume (Agent 1)
+    _start_parsing(resume_text)
+    parsed_resume = parse_resume_with_agent(resume_text, api_key=api_key)
+    error = _check_parsing(parsed_resume)
+    if error:
+        return error
+    
+    # Step 2: Analyze & Score (Agent 2)
+    _start_analysis(job_requirements)
+    analysis_result = analyze_candidate_with_agent(parsed_resume, job_requirements, api_key=api_key)
+    return _finish(parsed_resume, analysis_result)
+
+
+async def arun_complete_analysis(resume_text: str, job_requirements: dict, api_key: str = None, clients=None) -> dict:
+    """
+    Async version of run_complete_analysis - lets many resumes share one
+    event loop during bulk analysis
+    
+    clients is an optional AsyncClientPool so both agents reuse connections
+    """
+    
+    # Step 1: Parse Resume (Agent 1)
+    _start_parsing(resume_text)
+    parsed_resume = await aparse_resume_with_agent(resume_text, api_key=api_key, clients=clients)
+    error = _check_parsing(parsed_resume)
+    if error:
+        return error
+    
+    # Step 2: Analyze & Score (Agent 2)
+    _start_analysis(job_requirements)
+    analysis_result = await aanalyze_candidate_with_agent(
+        parsed_resume, job_requirements, api_key=api_key, clients=clients
+    )
+    return _finish(parsed_resume, analysis_result)
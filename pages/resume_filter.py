@@ -42,10 +42,13 @@ from io import BytesIO
 def extract_text_from_file(uploaded_file):
     """Extract text from PDF/DOCX/TXT files"""
     try:
+        # Read the upload once; each parser gets its own buffer over the bytes
+        raw = uploaded_file.getvalue()
+        
         if uploaded_file.type == "application/pdf":
             # Try PyPDF2 first
             try:
-                pdf_reader = PyPDF2.PdfReader(uploaded_file)
+                pdf_reader = PyPDF2.PdfReader(BytesIO(raw))
                 text = ""
                 for page in pdf_reader.pages:
                     text += page.extract_text() or ""
@@ -56,8 +59,7 @@ def extract_text_from_file(uploaded_file):
             
             # Fallback to pdfplumber
             try:
-                uploaded_file.seek(0)
-                with pdfplumber.open(uploaded_file) as pdf:
+                with pdfplumber.open(BytesIO(raw)) as pdf:
                     text = ""
                     for page in pdf.pages:
                         text += page.extract_text() or ""
@@ -70,7 +72,7 @@ def extract_text_from_file(uploaded_file):
         
         elif "wordprocessingml" in uploaded_file.type or uploaded_file.name.endswith(".docx"):
             try:
-                doc = Document(uploaded_file)
+                doc = Document(BytesIO(raw))
                 text = "\n".join([para.text for para in doc.paragraphs])
                 if text.strip():
                     return text, True, None
@@ -80,7 +82,7 @@ def extract_text_from_file(uploaded_file):
         
         else:  # Text file
             try:
-                text = uploaded_file.getvalue().decode("utf-8")
+                text = raw.decode("utf-8")
                 if text.strip():
                     return text, True, None
                 return "", False, "Text file is empty"
@@ -2,12 +2,41 @@
 API Key Manager - Handles automatic rotation of API keys when rate limits are hit
 """
 import os
+import threading
+import time
 from dotenv import load_dotenv
 import logging
 
+# Streamlit is optional here; fall back to a plain memo cache without it
+try:
+    from streamlit import cache_resource as _cache_resource
+except ImportError:
+    from functools import lru_cache
+
+    def _cache_resource(**kwargs):
+        return lru_cache(maxsize=None)
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+KEY_PREFIX = "GROQ_API_KEY_"
+
+# Seconds a key is avoided after it hits a rate limit
+RATE_LIMIT_COOLDOWN = 60
+
+
+def _collect_numbered_keys(source):
+    """Collect GROQ_API_KEY_<n> values from a mapping in one pass, ordered by n"""
+    numbered = []
+    for name, value in source.items():
+        if not name.startswith(KEY_PREFIX):
+            continue
+        suffix = name[len(KEY_PREFIX):]
+        if suffix.isdigit() and isinstance(value, str) and value:
+            numbered.append((int(suffix), value))
+    numbered.sort()
+    return numbered
+
 
 class APIKeyManager:
     """Manages multiple API keys with automatic rotation on rate limit"""
@@ -23,16 +52,11 @@ class APIKeyManager:
             if hasattr(st, 'secrets') and len(st.secrets) > 0:
                 logger.info("🔍 Checking Streamlit secrets for API keys...")
                 
-                # Try direct access to GROQ_API_KEY_1, GROQ_API_KEY_2, etc.
-                for i in range(1, 10):
-                    key_name = f"GROQ_API_KEY_{i}"
-                    try:
-                        key = st.secrets[key_name]
-                        if key and key != "your_first_api_key_here":
-                            self.api_keys.append(key)
-                            logger.info(f"✅ Loaded {key_name} from Streamlit secrets")
-                    except KeyError:
-                        pass  # Key doesn't exist
+                # Single walk over the secrets for GROQ_API_KEY_1, GROQ_API_KEY_2, etc.
+                for i, key in _collect_numbered_keys(dict(st.secrets)):
+                    if key != "your_first_api_key_here":
+                        self.api_keys.append(key)
+                        logger.info(f"✅ Loaded {KEY_PREFIX}{i} from Streamlit secrets")
                 
                 if not self.api_keys:
                     logger.warning("⚠️ No API keys found in Streamlit secrets")
@@ -47,11 +71,9 @@ class APIKeyManager:
         # Fallback to environment variables (for local development)
         if not self.api_keys:
             logger.info("🔍 Checking environment variables for API keys...")
-            for i in range(1, 10):
-                key = os.getenv(f"GROQ_API_KEY_{i}")
-                if key:
-                    self.api_keys.append(key)
-                    logger.info(f"✅ Loaded API key #{i} from environment")
+            for i, key in _collect_numbered_keys(os.environ):
+                self.api_keys.append(key)
+                logger.info(f"✅ Loaded API key #{i} from environment")
         
         # Last resort: single key
         if not self.api_keys:
@@ -61,6 +83,8 @@ class APIKeyManager:
                 logger.info("✅ Loaded single API key from GROQ_API_KEY")
         
         self.current_index = 0
+        self._lock = threading.Lock()
+        self._rate_limited_at = {}
         
         if self.api_keys:
             logger.info(f"🎉 Successfully loaded {len(self.api_keys)} API key(s) for rotation")
@@ -81,13 +105,59 @@ class APIKeyManager:
             logger.warning("⚠️ Only 1 API key available, cannot rotate")
             return self.api_keys[0] if self.api_keys else None
         
-        old_index = self.current_index
-        self.current_index = (self.current_index + 1) % len(self.api_keys)
+        with self._lock:
+            old_index = self.current_index
+            self.current_index = (self.current_index + 1) % len(self.api_keys)
         logger.info(f"🔄 Rotating API key: Key #{old_index + 1} → Key #{self.current_index + 1}")
         return self.api_keys[self.current_index]
     
-    def get_key_number(self):
-        """Get current key number (1-indexed)"""
+    def next_key(self):
+        """Hand out keys round-robin so concurrent requests spread across all keys"""
+        if not self.api_keys:
+            raise ValueError("No API keys configured!")
+        with self._lock:
+            key = self.api_keys[self.current_index]
+            self.current_index = (self.current_index + 1) % len(self.api_keys)
+        return key
+    
+    def mark_rate_limited(self, key):
+        """Record that key just hit a rate limit"""
+        with self._lock:
+            self._rate_limited_at[key] = time.monotonic()
+    
+    def is_rate_limited(self, key):
+        """Whether key hit a rate limit within the last RATE_LIMIT_COOLDOWN seconds"""
+        limited_at = self._rate_limited_at.get(key)
+        return limited_at is not None and time.monotonic() - limited_at < RATE_LIMIT_COOLDOWN
+    
+    def key_after(self, failed_key):
+        """Return the key after failed_key, preferring ones not recently rate limited.
+        
+        Leaves the round-robin cursor alone so retries don't skew next_key().
+        """
+        if not self.api_keys:
+            raise ValueError("No API keys configured!")
+        if len(self.api_keys) <= 1:
+            logger.warning("⚠️ Only 1 API key available, cannot rotate")
+            return self.api_keys[0]
+        
+        with self._lock:
+            if failed_key in self.api_keys:
+                start = self.api_keys.index(failed_key)
+            else:
+                start = self.current_index
+            candidates = [(start + step) % len(self.api_keys) for step in range(1, len(self.api_keys))]
+            index = next(
+                (i for i in candidates if not self.is_rate_limited(self.api_keys[i])),
+                candidates[0]  # All others are cooling down too; take the next one anyway
+            )
+        logger.info(f"🔄 Switching API key: Key #{start + 1} → Key #{index + 1}")
+        return self.api_keys[index]
+    
+    def get_key_number(self, key=None):
+        """Get key number (1-indexed) of the given key, or of the current key"""
+        if key is not None and key in self.api_keys:
+            return self.api_keys.index(key) + 1
         return self.current_index + 1
     
     def get_total_keys(self):
@@ -95,12 +165,7 @@ class APIKeyManager:
         return len(self.api_keys)
 
 
-# Global instance
-_api_key_manager = None
-
+@_cache_resource(show_spinner=False)
 def get_api_key_manager():
-    """Get or create the global API key manager"""
-    global _api_key_manager
-    if _api_key_manager is None:
-        _api_key_manager = APIKeyManager()
-    return _api_key_manager
+    """Get or create the global API key manager (one instance per server process)"""
+    return APIKeyManager()
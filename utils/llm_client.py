@@ -0,0 +1,159 @@
+"""
+LLM Client - Shared chat-completion calls with API key rotation for the agents
+"""
+import os
+from openai import OpenAI, AsyncOpenAI
+import logging
+
+from utils.api_key_manager import get_api_key_manager
+
+logger = logging.getLogger(__name__)
+
+
+def get_llm_config():
+    """Resolve provider, model and base URL from the environment"""
+    provider = os.getenv("LLM_PROVIDER", "openrouter").lower()
+    
+    if provider == "groq":
+        model = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+        base_url = "https://api.groq.com/openai/v1"
+    else:
+        model = os.getenv("OPENROUTER_MODEL", "meta-llama/llama-3.1-70b-instruct")
+        base_url = "https://openrouter.ai/api/v1"
+    return provider, model, base_url
+
+
+class AsyncClientPool:
+    """AsyncOpenAI clients per (key, base_url), shared across one bulk run so
+    connections and TLS sessions are reused between files"""
+    
+    def __init__(self):
+        self._clients = {}
+    
+    def get(self, api_key, base_url):
+        """Get the client for this key and endpoint, creating it on first use"""
+        client = self._clients.get((api_key, base_url))
+        if client is None:
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+            self._clients[(api_key, base_url)] = client
+        return client
+    
+    async def aclose(self):
+        """Close every client's connection pool"""
+        for client in self._clients.values():
+            await client.close()
+        self._clients.clear()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+def _pick_key(api_manager, api_key, provider, attempt):
+    """Return the key for this attempt, or an error result if none is configured"""
+    # Start on the assigned key unless it was just rate limited (e.g. by the other
+    # agent); retries already come from key_after
+    key = api_key or api_manager.get_current_key()
+    if attempt == 0 and api_manager.is_rate_limited(key):
+        key = api_manager.key_after(key)
+    logger.info(f"Using {provider.upper()} API Key #{api_manager.get_key_number(key)}/{api_manager.get_total_keys()}")
+    
+    if not key or key == "your_groq_key_here":
+        return None, {"status": "error", "error": f"{provider.upper()} API key not configured"}
+    return key, None
+
+
+def _handle_api_error(error, key, attempt, max_retries, api_manager):
+    """Rotate past key on rate limits; returns (key to retry with, None) or (None, error result)"""
+    error_str = str(error)
+    
+    # Check if it's a rate limit error
+    if "rate_limit" in error_str.lower() or "429" in error_str:
+        logger.warning(f"⚠️ Rate limit hit on Key #{api_manager.get_key_number(key)}")
+        if key:
+            api_manager.mark_rate_limited(key)
+        
+        # Rotate to next key
+        if attempt < max_retries - 1:
+            retry_key = api_manager.key_after(key)
+            logger.info(f"🔄 Retrying with Key #{api_manager.get_key_number(retry_key)}...")
+            return retry_key, None
+        else:
+            logger.error("❌ All API keys exhausted, all hit rate limits")
+            return None, {"status": "error", "error": "All API keys have hit rate limits. Please wait or add more keys."}
+    else:
+        # Non-rate-limit error, don't retry
+        logger.error(f"API call failed: {error_str}")
+        return None, {"status": "error", "error": f"API call failed: {error_str}"}
+
+
+def call_llm(messages, temperature, parse_response, max_retries: int = 3, api_key: str = None) -> dict:
+    """Run a chat completion with automatic key rotation; parse_response turns the text into a result"""
+    
+    api_manager = get_api_key_manager()
+    provider, model, base_url = get_llm_config()
+    
+    # Try with rotation
+    for attempt in range(max_retries):
+        key = None
+        try:
+            key, error = _pick_key(api_manager, api_key, provider, attempt)
+            if error:
+                return error
+            
+            logger.info(f"Using model: {model}")
+            
+            client = OpenAI(api_key=key, base_url=base_url)
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature
+            )
+            
+            result_text = response.choices[0].message.content
+            logger.info(f"Received response: {len(result_text)} characters")
+            return parse_response(result_text)
+        
+        except Exception as e:
+            api_key, error = _handle_api_error(e, key, attempt, max_retries, api_manager)
+            if error:
+                return error
+    
+    return {"status": "error", "error": "Failed after all retries"}
+
+
+async def acall_llm(messages, temperature, parse_response, max_retries: int = 3, api_key: str = None, clients: AsyncClientPool = None) -> dict:
+    """Async variant of call_llm; pass a shared AsyncClientPool to reuse connections"""
+    
+    api_manager = get_api_key_manager()
+    provider, model, base_url = get_llm_config()
+    
+    # Try with rotation
+    for attempt in range(max_retries):
+        key = None
+        try:
+            key, error = _pick_key(api_manager, api_key, provider, attempt)
+            if error:
+                return error
+            
+            logger.info(f"Using model: {model}")
+            
+            request = dict(model=model, messages=messages, temperature=temperature)
+            if clients is not None:
+                response = await clients.get(key, base_url).chat.completions.create(**request)
+            else:
+                async with AsyncOpenAI(api_key=key, base_url=base_url) as client:
+                    response = await client.chat.completions.create(**request)
+            
+            result_text = response.choices[0].message.content
+            logger.info(f"Received response: {len(result_text)} characters")
+            return parse_response(result_text)
+        
+        except Exception as e:
+            api_key, error = _handle_api_error(e, key, attempt, max_retries, api_manager)
+            if error:
+                return error
+    
+    return {"status": "error", "error": "Failed after all retries"}